@@ -0,0 +1,776 @@
+import os
+import functools
+import json
+import re
+import struct
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import ipywidgets as widgets
+from IPython import get_ipython
+from IPython.display import display
+from tornado.ioloop import IOLoop, PeriodicCallback
+
+# WAVファイルの長さを保存するキャッシュファイル名（フォルダ内に作成）
+DURATION_CACHE_FILE = ".durations.json"
+
+# paplayが終了しない場合に備えた予備タイマーの余裕（秒）
+PAPLAY_END_MARGIN = 2.0
+
+
+def get_kernel_io_loop():
+    """Jupyterカーネルのイベントループを取得（カーネル外では現在のループ）"""
+    kernel = getattr(get_ipython(), 'kernel', None)
+    if kernel is not None:
+        return kernel.io_loop
+    return IOLoop.current()
+
+
+@functools.lru_cache(maxsize=4096)
+def format_time(current_seconds, total_seconds):
+    """再生時間の表示文字列（例: 1:05 / 3:20）"""
+    return f"{current_seconds // 60}:{current_seconds % 60:02d} / {total_seconds // 60}:{total_seconds % 60:02d}"
+
+
+def natural_sort_key(name):
+    """数字部分を数値として比較する並び替えキー（track2.wav < track10.wav）"""
+    # キャプチャ付きのre.splitでは奇数番目が数字の並び（isdigit()は'²'などもTrueになるので使わない）
+    return [int(part) if i % 2 else part.lower() for i, part in enumerate(re.split(r'(\d+)', name))]
+
+
+def list_wav_files(folder_path):
+    """フォルダ内のWAVファイルのDirEntryを名前順で返す（数字は数値順、大文字小文字は区別しない。フォルダがなければ空）"""
+    try:
+        with os.scandir(folder_path) as entries:
+            wav_entries = [
+                entry for entry in entries
+                if entry.name.lower().endswith('.wav') and not entry.name.startswith('.') and entry.is_file()
+            ]
+    except OSError:
+        return []
+    # キーはsorted()がファイルごとに一度だけ計算する
+    # （Track2.wavとtrack2.wav、t02.wavとt2.wavのように同じキーになる名前は元の名前で順序を決める）
+    return sorted(wav_entries, key=lambda entry: (natural_sort_key(entry.name), entry.name))
+
+
+def load_duration_cache(folder_path):
+    """フォルダの長さのキャッシュファイルを読み込む（ファイル名: [mtime, size, 長さ（秒）]）"""
+    try:
+        with open(os.path.join(folder_path, DURATION_CACHE_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_duration_cache(folder_path, cache):
+    """フォルダの長さのキャッシュファイルを保存"""
+    cache_path = os.path.join(folder_path, DURATION_CACHE_FILE)
+    # 一時ファイルに書いてから置き換える
+    # （同時に保存されたり途中で中断されたりしても、書きかけのキャッシュファイルが残らない）
+    temp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_path, 'w') as f:
+            json.dump(cache, f)
+        os.replace(temp_path, cache_path)
+    except OSError:
+        # 書き込めないフォルダでもプレーヤーは動作させる
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+
+
+def read_wav_duration(file_path):
+    """
+    WAVファイルのヘッダだけを読んで長さ（秒）を返す
+    
+    サンプルデータは読まず、fmtチャンクのバイトレートと
+    dataチャンクのサイズから長さを計算する
+    """
+    with open(file_path, 'rb') as f:
+        header = f.read(44)
+        if len(header) < 12 or header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+            raise ValueError("RIFF/WAVEヘッダが見つかりません")
+        
+        if header[12:16] == b'fmt ' and header[36:40] == b'data':
+            # 標準的な44バイトヘッダ（fmtの直後にdata）
+            byte_rate = struct.unpack_from('<I', header, 28)[0]
+            data_size = struct.unpack_from('<I', header, 40)[0]
+        else:
+            # LISTなどの追加チャンクがある場合はチャンクを順にたどる
+            byte_rate = None
+            data_size = None
+            f.seek(12)
+            while byte_rate is None or data_size is None:
+                chunk_header = f.read(8)
+                if len(chunk_header) < 8:
+                    raise ValueError("fmt/dataチャンクが見つかりません")
+                chunk_id, chunk_size = struct.unpack('<4sI', chunk_header)
+                chunk_end = f.tell() + chunk_size + (chunk_size & 1)  # 偶数バイト境界
+                if chunk_id == b'fmt ':
+                    fmt = f.read(16)
+                    if len(fmt) < 12:
+                        raise ValueError("fmtチャンクが途中で切れています")
+                    byte_rate = struct.unpack_from('<I', fmt, 8)[0]
+                elif chunk_id == b'data':
+                    data_size = chunk_size
+                f.seek(chunk_end)
+    
+    if byte_rate == 0:
+        raise ValueError("バイトレートが0です")
+    return data_size / byte_rate
+
+
+class AudioBackend:
+    """
+    オーディオ出力バックエンドの共通インターフェース
+    
+    曲が最後まで再生されたら on_end(play_id) を呼び出す。
+    play_id は再生を開始・停止するたびに変わるため、
+    古い終了通知かどうかを呼び出し側で判定できる。
+    """
+    def __init__(self, on_end):
+        self.on_end = on_end
+        self.play_id = 0
+    
+    def load(self, file_path, duration):
+        """再生するファイルを設定（durationはヘッダから取得した長さ（秒））"""
+        raise NotImplementedError
+    
+    def play(self):
+        """読み込んだファイルを先頭から再生"""
+        raise NotImplementedError
+    
+    def pause(self):
+        """一時停止"""
+        raise NotImplementedError
+    
+    def resume(self):
+        """一時停止した位置から再開"""
+        raise NotImplementedError
+    
+    def stop(self):
+        """停止"""
+        raise NotImplementedError
+    
+    def position(self):
+        """現在の再生位置（秒）"""
+        raise NotImplementedError
+    
+    def length(self):
+        """再生中のファイルの長さ（秒）"""
+        raise NotImplementedError
+    
+    def set_volume(self, volume):
+        """音量を設定（0.0〜1.0）"""
+        raise NotImplementedError
+    
+    def close(self):
+        """リソースの解放"""
+        pass
+
+
+class PaplayBackend(AudioBackend):
+    """paplayで再生し、曲の終了はpaplayの終了で通知するバックエンド（paplayがなければタイマーで通知）"""
+    def __init__(self, on_end):
+        super().__init__(on_end)
+        self.paplay_path = self._find_paplay()
+        self.current_process = None  # 再生中のpaplayプロセス
+        self.end_timer = None  # 曲の終了を通知するタイマー（paplayの終了を検出できない場合の予備）
+        self.file_path = None
+        self.duration = 0
+        self.volume = 0.7
+        self.play_start = 0  # 再生位置0に相当する時刻（time.monotonic()基準）
+        self.paused_position = 0  # 一時停止・停止中の再生位置（秒）
+        self.is_running = False
+    
+    def _find_paplay(self):
+        """paplayのパスを取得（見つからなければNone）"""
+        paplay_paths = [
+            "/opt/kernel/bin/paplay",
+            "/usr/bin/paplay"
+        ]
+        
+        for path in paplay_paths:
+            if os.path.exists(path):
+                return path
+        return None
+    
+    def load(self, file_path, duration):
+        self.stop()
+        self.file_path = file_path
+        self.duration = duration
+    
+    def play(self):
+        self._start(0)
+    
+    def pause(self):
+        self.paused_position = self.position()
+        self._halt()
+    
+    def resume(self):
+        # paplayはシークできないため音声はファイルの先頭から再生し直す
+        self._start(self.paused_position)
+    
+    def stop(self):
+        self._halt()
+        self.paused_position = 0
+    
+    def position(self):
+        if self.is_running:
+            return time.monotonic() - self.play_start
+        return self.paused_position
+    
+    def length(self):
+        return self.duration
+    
+    def set_volume(self, volume):
+        self.volume = volume  # 次に再生を開始したときに反映
+    
+    def close(self):
+        self.stop()
+    
+    def _start(self, position):
+        """再生位置positionとして再生を開始"""
+        self._halt()
+        self.play_id += 1
+        self.play_start = time.monotonic() - position
+        self.is_running = True
+        
+        self._play_with_external_player(self.file_path)
+        
+        if self.current_process is not None:
+            # paplayが最後まで再生して終了したら通知（バッファに残った音声も再生し終えてから終了する）
+            waiter = threading.Thread(
+                target=self._wait_for_exit, args=(self.current_process, self.play_id)
+            )
+            waiter.daemon = True
+            waiter.start()
+            # paplayは常にファイルの先頭から再生するので、予備のタイマーは曲全体の長さ＋余裕で設定
+            remaining = self.duration + PAPLAY_END_MARGIN
+        else:
+            remaining = self.duration - position
+        
+        # 曲の残り時間が経過したら終了を通知（ヘッダから長さを取得できた場合）
+        if self.duration > 0:
+            self.end_timer = threading.Timer(
+                max(0, remaining), self.on_end, args=(self.play_id,)
+            )
+            self.end_timer.daemon = True
+            self.end_timer.start()
+    
+    def _wait_for_exit(self, process, play_id):
+        """paplayの終了を待ち、正常終了なら曲の終了を通知（別スレッドで実行）"""
+        # 停止で終了させた場合はterminate/killによる終了コードになるので通知しない
+        # （エラー終了した場合は予備のタイマーで次の曲へ進む）
+        if process.wait() == 0:
+            self.on_end(play_id)
+    
+    def _halt(self):
+        """タイマーとpaplayを止める"""
+        self.play_id += 1
+        self.is_running = False
+        if self.end_timer is not None:
+            self.end_timer.cancel()
+            self.end_timer = None
+        self._stop_external_player()
+    
+    def _play_with_external_player(self, file_path):
+        """実際の音声出力（外部プレーヤー使用）"""
+        try:
+            # paplayが使える場合はそれを使用
+            if self.paplay_path:
+                # 以前の再生プロセスを停止
+                self._stop_external_player()
+                
+                # 新しいプロセスで再生
+                self.current_process = subprocess.Popen(
+                    [self.paplay_path, f"--volume={int(self.volume * 65536)}", file_path],
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL
+                )
+        except Exception as e:
+            # エラーは無視（終了タイマーだけで連続再生を実現）
+            pass
+    
+    def _stop_external_player(self):
+        """外部プレーヤープロセスを停止"""
+        if self.current_process is not None:
+            try:
+                self.current_process.terminate()
+                # 終了を待って回収する（回収しないとゾンビプロセスが残る）
+                try:
+                    self.current_process.wait(timeout=0.2)
+                except subprocess.TimeoutExpired:
+                    self.current_process.kill()
+                    self.current_process.wait()
+                self.current_process = None
+            except:
+                pass
+
+
+class VLCBackend(AudioBackend):
+    """python-vlcで再生するバックエンド"""
+    def __init__(self, on_end):
+        super().__init__(on_end)
+        try:
+            import vlc
+        except ImportError:
+            raise ImportError("python-vlcをインストールしてください: pip install python-vlc") from None
+        self.vlc = vlc
+        self.duration = 0
+        
+        # VLCインスタンスとプレーヤーを作成
+        self.instance = self.vlc.Instance('--no-xlib')
+        self.player = self.instance.media_player_new()
+        
+        # イベントマネージャの設定
+        self.event_manager = self.player.event_manager()
+        self.event_manager.event_attach(self.vlc.EventType.MediaPlayerEndReached, self._on_end_reached)
+    
+    def _on_end_reached(self, event):
+        """再生終了時のイベントハンドラ（VLCのイベントスレッドで実行）"""
+        self.on_end(self.play_id)
+    
+    def load(self, file_path, duration):
+        self.stop()
+        self.duration = duration
+        self.player.set_media(self.instance.media_new(file_path))
+    
+    def play(self):
+        self.play_id += 1
+        self.player.play()
+    
+    def pause(self):
+        self.player.set_pause(True)  # パラメータ1は一時停止を意味する
+    
+    def resume(self):
+        self.player.set_pause(False)  # パラメータ0は再開を意味する
+    
+    def stop(self):
+        self.play_id += 1
+        self.player.stop()
+    
+    def position(self):
+        return max(0, self.player.get_time()) / 1000  # ミリ秒から秒に変換
+    
+    def length(self):
+        # 解析が終わるまでVLCは長さ0を返すのでヘッダから取得した長さを使う
+        length = self.player.get_length()
+        return length / 1000 if length > 0 else self.duration
+    
+    def set_volume(self, volume):
+        self.player.audio_set_volume(int(volume * 100))  # VLCの音量は0-100
+    
+    def close(self):
+        self.player.stop()
+        self.event_manager.event_detach(self.vlc.EventType.MediaPlayerEndReached)
+        self.instance.release()
+
+
+# バックエンド名と実装クラスの対応
+BACKENDS = {
+    'paplay': PaplayBackend,
+    'vlc': VLCBackend,
+}
+
+
+class WAVPlayer:
+    def __init__(self, folder_path="outputs", backend="paplay"):
+        """
+        WAVファイルプレーヤーの初期化
+        
+        Parameters:
+        -----------
+        folder_path : str
+            WAVファイルを含むフォルダのパス
+        backend : str
+            音声出力に使うバックエンド（'paplay' または 'vlc'）
+        """
+        # フォルダ内のwavファイルを取得
+        self.folder_path = folder_path
+        wav_entries = list_wav_files(folder_path)
+        self.file_list = [entry.path for entry in wav_entries]
+        self.backend = None  # 初期化を途中で終えた場合はNoneのまま（cleanupで判定）
+        if not self.file_list:
+            print(f"フォルダ{folder_path}にWAVファイルが見つかりません")
+            return
+        self.basenames = [entry.name for entry in wav_entries]  # 表示用のファイル名
+        # 長さのキャッシュの照合用（scandirで取得したstatを再利用）
+        self.file_stats = {
+            entry.path: (entry.stat().st_mtime, entry.stat().st_size) for entry in wav_entries
+        }
+        
+        # 音声出力バックエンドの作成
+        try:
+            self.backend = BACKENDS[backend](self._on_track_end)
+        except ImportError as e:
+            print(e)
+            return
+        
+        # 再生関連の変数初期化
+        self.current_index = 0
+        self.is_playing = False
+        self.is_paused = False
+        self.volume = 0.7  # 音量 (0.0〜1.0)
+        self.current_file = ""
+        self.lock = threading.RLock()  # 再生状態を操作する処理を直列化する
+        self.backend.set_volume(self.volume)
+        
+        # 曲の長さを格納する辞書
+        self.durations = self._get_wav_durations()
+        
+        # GUIの作成
+        self._create_gui()
+        
+        # 再生状態の監視（再生中のみカーネルのイベントループ上で定期実行）
+        self.last_display = None  # 最後に表示した (秒, %, 総秒数)
+        self.io_loop = get_kernel_io_loop()
+        self.monitor_callback = PeriodicCallback(self._tick, 250)
+    
+    
+    def _get_wav_durations(self):
+        """WAVファイルの長さを取得（変更のないファイルはキャッシュを使用）"""
+        cache = load_duration_cache(self.folder_path)
+        durations = {}
+        missing = []
+        for wav_file, name in zip(self.file_list, self.basenames):
+            entry = cache.get(name)
+            if entry and tuple(entry[:2]) == self.file_stats[wav_file]:
+                durations[wav_file] = entry[2]
+            else:
+                missing.append(wav_file)
+        
+        if missing:
+            # ヘッダ読み込みはI/O待ちが主なのでスレッドで並列化
+            with ThreadPoolExecutor(max_workers=min(32, len(missing))) as executor:
+                durations.update(zip(missing, executor.map(self._parse_duration, missing)))
+            self._save_cache(durations)
+        return durations
+    
+    def _save_cache(self, durations):
+        """長さのキャッシュファイルを保存（ファイル名: [mtime, size, 長さ]）"""
+        cache = {
+            os.path.basename(wav_file): [*self.file_stats[wav_file], duration]
+            for wav_file, duration in durations.items()
+        }
+        save_duration_cache(self.folder_path, cache)
+    
+    def _parse_duration(self, wav_file):
+        """1ファイル分の長さを取得（失敗時は0）"""
+        try:
+            return read_wav_duration(wav_file)
+        except Exception as e:
+            print(f"ファイル {wav_file} の長さを取得できませんでした: {e}")
+            return 0
+    
+    def _create_gui(self):
+        """GUIコンポーネントの作成と配置"""
+        # ファイル選択ドロップダウン
+        self.file_dropdown = widgets.Dropdown(
+            options=self.basenames,
+            description='ファイル:',
+            style={'description_width': 'initial'},
+            layout=widgets.Layout(width='90%')
+        )
+        self.file_dropdown.observe(self._on_file_select, names='index')  # 選択位置で通知
+        
+        # 再生コントロールボタン
+        button_layout = widgets.Layout(width='auto')
+        
+        self.play_button = widgets.Button(
+            description='再生',
+            layout=button_layout,
+            button_style='primary'
+        )
+        self.pause_button = widgets.Button(
+            description='一時停止',
+            layout=button_layout
+        )
+        self.stop_button = widgets.Button(
+            description='停止',
+            layout=button_layout
+        )
+        self.prev_button = widgets.Button(
+            description='前へ',
+            layout=button_layout
+        )
+        self.next_button = widgets.Button(
+            description='次へ',
+            layout=button_layout
+        )
+        
+        self.play_button.on_click(self._on_play)
+        self.pause_button.on_click(self._on_pause)
+        self.stop_button.on_click(self._on_stop)
+        self.prev_button.on_click(self._on_prev)
+        self.next_button.on_click(self._on_next)
+        
+        # 音量コントロール
+        self.volume_slider = widgets.FloatSlider(
+            value=self.volume,
+            min=0,
+            max=1.0,
+            step=0.05,
+            description='音量:',
+            continuous_update=True,
+            style={'description_width': 'initial'},
+            layout=widgets.Layout(width='90%')
+        )
+        self.volume_slider.observe(self._on_volume_change, names='value')
+        
+        # 自動再生切り替え
+        self.autoplay_checkbox = widgets.Checkbox(
+            value=True,
+            description='自動的に次の曲を再生',
+            indent=False
+        )
+        
+        # 現在再生中のファイル表示
+        self.current_file_label = widgets.HTML(
+            value='<b>再生ファイル:</b> なし'
+        )
+        
+        # 再生プログレスバー
+        self.progress_bar = widgets.FloatProgress(
+            value=0,
+            min=0,
+            max=100,
+            description='進行状況:',
+            style={'description_width': 'initial'},
+            layout=widgets.Layout(width='90%')
+        )
+        
+        # 再生時間表示
+        self.time_label = widgets.Label(
+            value='0:00 / 0:00',
+            layout=widgets.Layout(width='120px')
+        )
+        
+        # プログレスバーと時間を横並びに
+        progress_box = widgets.HBox([
+            self.progress_bar,
+            self.time_label
+        ])
+        
+        # コントロールボタンの配置
+        controls = widgets.HBox([
+            self.play_button, 
+            self.pause_button,
+            self.stop_button, 
+            self.prev_button, 
+            self.next_button
+        ])
+        
+        # 全体コンテナ
+        container = widgets.VBox([
+            self.file_dropdown,
+            controls,
+            self.volume_slider,
+            self.autoplay_checkbox,
+            self.current_file_label,
+            progress_box
+        ])
+        
+        display(container)
+    
+    def start_monitor(self):
+        """再生状態の監視を開始"""
+        # PeriodicCallbackはイベントループのスレッドから開始する必要がある
+        self.io_loop.add_callback(self._start_monitor_callback)
+    
+    def _start_monitor_callback(self):
+        """監視用のコールバックを開始（イベントループ上で実行）"""
+        if not self.monitor_callback.is_running():
+            self.monitor_callback.start()
+    
+    def stop_monitor(self):
+        """再生状態の監視を停止"""
+        self.io_loop.add_callback(self.monitor_callback.stop)
+    
+    def _tick(self):
+        """再生状態を監視（再生中に250msごとに呼ばれる）"""
+        with self.lock:
+            if not self.is_playing or self.is_paused:
+                # 停止の反映前に呼ばれた場合
+                return
+            
+            current_time = self.backend.position()
+            total_duration = self.backend.length()
+            
+            # プログレスバーと時間表示の更新
+            if total_duration > 0:
+                progress = min(100, (current_time / total_duration) * 100)
+                
+                # 表示（秒と%）が変わったときだけフロントエンドに同期
+                display_state = (int(current_time), int(progress), int(total_duration))
+                if display_state != self.last_display:
+                    self.last_display = display_state
+                    with self.progress_bar.hold_sync(), self.time_label.hold_sync():
+                        self.progress_bar.value = progress
+                        self.time_label.value = format_time(int(current_time), int(total_duration))
+    
+    def _on_track_end(self, play_id):
+        """曲の終了時にバックエンドから呼ばれる"""
+        # 注: バックエンドのスレッド（VLCのイベントスレッドなど）から呼ばれるため、
+        #     ロックを取らずにカーネルのイベントループに処理を渡す
+        #     （ロックを持ったままVLCのstop()を呼ぶとイベントスレッドを待ってデッドロックする。
+        #       ウィジェットの更新もイベントループ（メインスレッド）で行う）
+        self.io_loop.add_callback(self._advance_after_end, play_id)
+    
+    def _advance_after_end(self, play_id):
+        """再生終了後の処理（カーネルのイベントループ上で実行）"""
+        with self.lock:
+            if play_id != self.backend.play_id:
+                # 待っている間に停止・曲の切り替えが行われた古い通知
+                return
+            
+            if self.is_playing and not self.is_paused:
+                if self.autoplay_checkbox.value:
+                    # 曲が終了したら次の曲へ
+                    self._on_next(None)
+                else:
+                    self._on_stop(None)
+    
+    def _on_file_select(self, change):
+        """ファイル選択ドロップダウンの変更イベントハンドラ"""
+        with self.lock:
+            if change['new'] is not None:
+                new_index = change['new']
+                if new_index != self.current_index:
+                    self.current_index = new_index
+                    if self.is_playing:
+                        self._play_current()
+    
+    def _on_play(self, b):
+        """再生ボタンのイベントハンドラ"""
+        with self.lock:
+            if not self.is_playing:
+                # 新規再生
+                self._play_current()
+            elif self.is_paused:
+                # 一時停止からの再開
+                self.backend.resume()
+                self.is_paused = False
+                self.start_monitor()
+    
+    def _on_pause(self, b):
+        """一時停止ボタンのイベントハンドラ"""
+        with self.lock:
+            if self.is_playing and not self.is_paused:
+                self.backend.pause()
+                self.is_paused = True
+                self.stop_monitor()
+    
+    def _on_stop(self, b):
+        """停止ボタンのイベントハンドラ"""
+        with self.lock:
+            if self.is_playing:
+                self.backend.stop()
+                self.is_playing = False
+                self.is_paused = False
+                self.stop_monitor()
+                
+                # 表示をリセット
+                self.current_file_label.value = '<b>再生ファイル:</b> なし'
+                self.last_display = None
+                with self.progress_bar.hold_sync(), self.time_label.hold_sync():
+                    self.progress_bar.value = 0
+                    self.time_label.value = "0:00 / 0:00"
+    
+    def _on_prev(self, b):
+        """前へボタンのイベントハンドラ"""
+        with self.lock:
+            if len(self.file_list) > 0:
+                # 前のトラックへ
+                prev_index = (self.current_index - 1) % len(self.file_list)
+                # ボタン操作で同じ曲（1曲だけのフォルダ）を再生中なら何もしない
+                # （曲の終了から呼ばれた場合は繰り返し再生する）
+                if prev_index == self.current_index and self.is_playing and b is not None:
+                    return
+                
+                self.current_index = prev_index
+                if self.is_playing:
+                    self._play_current()
+                else:
+                    self.file_dropdown.index = self.current_index
+    
+    def _on_next(self, b):
+        """次へボタンのイベントハンドラ"""
+        with self.lock:
+            if len(self.file_list) > 0:
+                # 次のトラックへ
+                next_index = (self.current_index + 1) % len(self.file_list)
+                # ボタン操作で同じ曲（1曲だけのフォルダ）を再生中なら何もしない
+                # （曲の終了から呼ばれた場合は繰り返し再生する）
+                if next_index == self.current_index and self.is_playing and b is not None:
+                    return
+                
+                self.current_index = next_index
+                if self.is_playing:
+                    self._play_current()
+                else:
+                    self.file_dropdown.index = self.current_index
+    
+    def _on_volume_change(self, change):
+        """音量スライダーの変更イベントハンドラ"""
+        self.volume = change['new']
+        self.backend.set_volume(self.volume)
+    
+    def _play_current(self):
+        """現在選択されているファイルを再生"""
+        with self.lock:
+            if 0 <= self.current_index < len(self.file_list):
+                current_file = self.file_list[self.current_index]
+                
+                # 音声出力の開始
+                self.backend.load(current_file, self.durations.get(current_file, 0))
+                self.backend.play()
+                
+                # 状態更新
+                self.is_playing = True
+                self.is_paused = False
+                self.current_file = self.basenames[self.current_index]
+                self.current_file_label.value = f'<b>再生ファイル:</b> {self.current_file}'
+                self.start_monitor()
+                
+                # 再生中に次の曲を読み込んでおく
+                self._prefetch_next()
+    
+    def _prefetch_next(self):
+        """次の曲をOSのページキャッシュに先読みさせる（曲切り替え時の読み込み待ちを隠す）"""
+        if not hasattr(os, 'posix_fadvise') or len(self.file_list) < 2:
+            return
+        
+        next_file = self.file_list[(self.current_index + 1) % len(self.file_list)]
+        try:
+            fd = os.open(next_file, os.O_RDONLY)
+            try:
+                # 非同期の先読みを依頼するだけなのでブロックしない
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            finally:
+                os.close(fd)
+        except OSError:
+            pass
+    
+    def cleanup(self):
+        """リソースの解放"""
+        if self.backend is None:
+            # WAVファイルがない・バックエンドを作成できなかった場合は何も開始していない
+            return
+        
+        # 監視を停止
+        self.stop_monitor()
+        
+        # 再生停止とバックエンドの解放
+        self.backend.stop()
+        self.backend.close()
+        
+        # 長さのキャッシュを保存
+        self._save_cache(self.durations)
+
+# 使用例
+# player = WAVPlayer("outputs", backend="paplay")  # VLCを使う場合は backend="vlc"
+# プレーヤーを使い終わったら cleanup() を呼び出すことを推奨
+# player.cleanup()
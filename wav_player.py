@@ -1,12 +1,19 @@
 import os
 import pygame
-import glob
 import threading
 import time
+from collections import OrderedDict
 import ipywidgets as widgets
 from IPython.display import display, clear_output
-import numpy as np
-from scipy.io import wavfile
+from tornado.ioloop import PeriodicCallback
+from audio_player import (
+    get_kernel_io_loop, list_wav_files, load_duration_cache, read_wav_duration, save_duration_cache
+)
+
+# デコード済みのSoundを保持する合計サイズ（ミキサーの形式に展開した後のバイト数）
+SOUND_CACHE_BYTES = 200 * 1024 * 1024
+# 展開後にこれより大きくなる曲はメモリに展開せずmixer.musicでストリーミング再生する
+SOUND_MAX_BYTES = 50 * 1024 * 1024
 
 class WAVPlayer:
     def __init__(self, folder_path="outputs"):
@@ -20,10 +27,16 @@ class WAVPlayer:
         """
         # フォルダ内のwavファイルを取得
         self.folder_path = folder_path
-        self.file_list = sorted(glob.glob(os.path.join(folder_path, "*.wav")))
+        wav_entries = list_wav_files(folder_path)
+        self.file_list = [entry.path for entry in wav_entries]
         if not self.file_list:
             print(f"フォルダ{folder_path}にWAVファイルが見つかりません")
             return
+        self.basenames = [entry.name for entry in wav_entries]  # 表示用のファイル名
+        # 長さのキャッシュの照合用（scandirで取得したstatを再利用）
+        self.file_stats = {
+            entry.path: (entry.stat().st_mtime, entry.stat().st_size) for entry in wav_entries
+        }
         
         # 再生関連の変数初期化
         self.current_index = 0
@@ -31,27 +44,44 @@ class WAVPlayer:
         self.is_paused = False
         self.volume = 0.7  # デフォルト音量
         self.current_file = ""
+        self.play_start = 0  # 再生を開始した時刻（time.monotonic()基準）
+        self.paused_total = 0  # 一時停止していた時間の合計（秒）
+        self.pause_start = None  # 一時停止した時刻
+        self.last_progress = 0  # 最後に表示した進行状況（整数の%）
+        self.select_timeout = None  # ドロップダウンで選んだ曲を読み込むまでの待機（call_laterのハンドル）
+        self.pending_index = None  # 読み込み待ちの曲のインデックス
+        self.duration_cache = {}  # ファイルパス -> 長さ（ミリ秒）
+        self.duration_lock = threading.Lock()  # duration_cacheは先読みスレッドからも更新される
+        self._load_cache()
+        
+        # 曲の長さをバックグラウンドで先に計算しておく（再生中の監視で読み込み待ちが起きないように）
+        duration_thread = threading.Thread(target=self._prefetch_durations)
+        duration_thread.daemon = True
+        duration_thread.start()
         
-        # pygameの初期化
-        pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=4096)
-        pygame.init()
-        pygame.mixer.music.set_volume(self.volume)
+        # ミキサーは最初の再生時に初期化する（再生しなければオーディオデバイスを開かない）
+        self.mixer_ready = False
+        self.sounds = OrderedDict()  # ファイルパス -> Sound（古い順、合計SOUND_CACHE_BYTESまで）
+        self.sounds_bytes = 0  # sounds の展開後の合計バイト数
+        self.channel = None  # Soundを再生中のChannel（mixer.musicで再生中はNone）
         
-        # 曲が終了したときの処理のためのイベント設定
+        # 曲が終了したときに送られるイベント
         self.MUSIC_END = pygame.USEREVENT + 1
-        pygame.mixer.music.set_endevent(self.MUSIC_END)
         
         # GUIの作成
         self._create_gui()
         
-        # 監視スレッド
-        self.monitor_thread = None
-        self.start_monitor()
+        # 再生状態の監視（カーネルのイベントループ上で100msごとに実行）
+        # ウィジェットの更新もイベントループ（メインスレッド）で行われる
+        self.io_loop = get_kernel_io_loop()
+        self.monitor_callback = PeriodicCallback(self._tick, 100)
+        # PeriodicCallbackはイベントループのスレッドから開始する必要がある
+        self.io_loop.add_callback(self.monitor_callback.start)
     
     def _create_gui(self):
         """GUIコンポーネントの作成と配置"""
         # ファイル選択ドロップダウン
-        file_options = [(os.path.basename(f), i) for i, f in enumerate(self.file_list)]
+        file_options = [(name, i) for i, name in enumerate(self.basenames)]
         self.file_dropdown = widgets.Dropdown(
             options=file_options,
             description='ファイル:',
@@ -119,73 +149,169 @@ class WAVPlayer:
         
         display(self.gui)
     
-    def start_monitor(self):
-        """音楽の再生状態を監視するスレッドを開始"""
-        if self.monitor_thread is None or not self.monitor_thread.is_alive():
-            self.monitor_thread = threading.Thread(target=self._monitor_playback)
-            self.monitor_thread.daemon = True
-            self.monitor_thread.start()
-    
-    def _monitor_playback(self):
-        """再生状態を監視し、曲の終了やプログレスバーの更新を処理"""
-        while True:
-            time.sleep(0.1)
-            
-            # イベントの確認
-            for event in pygame.event.get():
-                if event.type == self.MUSIC_END:
-                    # 曲が終了したら次の曲へ
-                    if self.is_playing and not self.is_paused:
-                        self._on_next(None)
-            
-            # プログレスバーの更新（再生中の場合）
-            if self.is_playing and not self.is_paused:
-                # 現在の再生位置を取得（ミリ秒）
-                current_pos = pygame.mixer.music.get_pos()
-                if current_pos > 0:
-                    # ファイルの総時間を取得
-                    try:
-                        rate, data = wavfile.read(self.file_list[self.current_index])
-                        if len(data.shape) > 1:  # ステレオの場合
-                            duration = len(data) / rate * 1000  # ミリ秒に変換
-                        else:  # モノラルの場合
-                            duration = len(data) / rate * 1000
-                        
-                        progress = min(100, (current_pos / duration) * 100)
-                        self.progress_bar.value = progress
-                    except Exception as e:
-                        # エラーがあっても処理を続行
-                        pass
+    def _tick(self):
+        """再生状態を監視し、曲の終了やプログレスバーの更新を処理（100msごとに呼ばれる）"""
+        if not self.is_playing or self.is_paused:
+            # 停止・一時停止中は何もしない
+            return
+        
+        # 曲の終了を検出
+        if self._track_ended():
+            if self._cancel_select():
+                # ドロップダウンで選んだ曲の読み込み待ちなら、次の曲ではなく選んだ曲へ
+                self._play_selected()
+            else:
+                # 曲が終了したら次の曲へ
+                self._on_next(None)
+            return
+        
+        # プログレスバーの更新
+        # 現在の再生位置を取得（ミリ秒、一時停止していた時間を除く）
+        current_pos = (time.monotonic() - self.play_start - self.paused_total) * 1000
+        if current_pos > 0:
+            # ファイルの総時間を取得
+            try:
+                duration = self._get_duration_ms(self.file_list[self.current_index])
+            except Exception as e:
+                # エラーがあっても処理を続行
+                return
+            if duration > 0:
+                progress = min(100, (current_pos / duration) * 100)
+                # 1%以上変わったときだけフロントエンドに同期
+                if int(progress) != self.last_progress:
+                    self.last_progress = int(progress)
+                    self.progress_bar.value = progress
+    
+    def _get_duration_ms(self, path):
+        """ファイルの長さ（ミリ秒）を取得（先読みが済んでいなければその場で計算）"""
+        with self.duration_lock:
+            duration = self.duration_cache.get(path)
+        if duration is None:
+            duration = self._read_duration_ms(path)
+            with self.duration_lock:
+                self.duration_cache[path] = duration
+        return duration
+    
+    def _prefetch_durations(self):
+        """全ファイルの長さを計算してキャッシュに格納（起動時に別スレッドで実行）"""
+        updated = False
+        for path in self.file_list:
+            with self.duration_lock:
+                if path in self.duration_cache:
+                    continue
+            try:
+                duration = self._read_duration_ms(path)
+            except Exception:
+                # 読めないファイルは再生時にもう一度試す
+                continue
+            with self.duration_lock:
+                self.duration_cache[path] = duration
+            updated = True
+        
+        if updated:
+            self._save_cache()
+    
+    def _load_cache(self):
+        """長さのキャッシュファイルから変更のないファイルの長さを読み込む"""
+        cache = load_duration_cache(self.folder_path)
+        for path, name in zip(self.file_list, self.basenames):
+            entry = cache.get(name)
+            if entry and tuple(entry[:2]) == self.file_stats[path] and entry[2] > 0:
+                self.duration_cache[path] = entry[2] * 1000  # 秒からミリ秒に変換
+    
+    def _save_cache(self):
+        """長さのキャッシュファイルを保存（audio_player.WAVPlayerと同じ形式で、長さは秒）"""
+        with self.duration_lock:
+            cache = {
+                os.path.basename(path): [*self.file_stats[path], duration / 1000]
+                for path, duration in self.duration_cache.items()
+            }
+        save_duration_cache(self.folder_path, cache)
+    
+    def _read_duration_ms(self, path):
+        """ファイルの長さ（ミリ秒）を計算"""
+        try:
+            # ヘッダだけを読んで長さを計算（サンプルデータは読まない）
+            return read_wav_duration(path) * 1000  # ミリ秒に変換
+        except ValueError:
+            # ヘッダを解析できない形式（RIFXなど）はscipyで読み込む
+            # （mmapで開くのでサンプルデータはメモリにコピーされない）
+            # scipyは読み込みに時間がかかるため、必要になったときだけインポートする
+            from scipy.io import wavfile
+            rate, data = wavfile.read(path, mmap=True)
+            frames = len(data)  # フレーム数はチャンネル数によらずlen(data)
+            del data  # mmapをすぐに解放して、ファイルを開いたままにしない
+            return frames / rate * 1000
     
     def _on_file_select(self, change):
         """ファイル選択ドロップダウンの変更イベントハンドラ"""
-        if change['new'] is not None:
+        if change['new'] is None:
+            return
+        if self.is_playing:
+            # 選択を続けて変えている間は読み込まず、最後に選んだ曲だけを再生する
+            # （読み込むまでは再生中の曲がcurrent_indexのまま）
+            self._cancel_select()
+            if change['new'] != self.current_index:
+                self.pending_index = change['new']
+                self.select_timeout = self.io_loop.call_later(0.15, self._play_selected)
+        elif change['new'] != self.current_index:
             self.current_index = change['new']
-            if self.is_playing:
-                self._play_current()
+    
+    def _play_selected(self):
+        """ドロップダウンで選ばれた曲を再生（選択から0.15秒後に呼ばれる）"""
+        self.select_timeout = None
+        if self.is_playing:
+            self.current_index = self.pending_index
+            self._play_current()
+    
+    def _cancel_select(self):
+        """読み込み待ちの選択を取り消す（取り消した場合はTrue）"""
+        if self.select_timeout is None:
+            return False
+        self.io_loop.remove_timeout(self.select_timeout)
+        self.select_timeout = None
+        return True
     
     def _on_play(self, b):
         """再生ボタンのイベントハンドラ"""
         if not self.is_playing:
             self._play_current()
         elif self.is_paused:
-            pygame.mixer.music.unpause()
+            if self.channel is not None:
+                self.channel.unpause()
+            else:
+                pygame.mixer.music.unpause()
             self.is_paused = False
+            self.paused_total += time.monotonic() - self.pause_start
+            self.pause_start = None
     
     def _on_pause(self, b):
         """一時停止ボタンのイベントハンドラ"""
         if self.is_playing and not self.is_paused:
-            pygame.mixer.music.pause()
+            if self.channel is not None:
+                self.channel.pause()
+            else:
+                pygame.mixer.music.pause()
             self.is_paused = True
+            self.pause_start = time.monotonic()
+            if self._cancel_select():
+                # 選んだ曲は読み込まないので、ドロップダウンを再生中の曲に戻す
+                self.file_dropdown.value = self.current_index
     
     def _on_stop(self, b):
         """停止ボタンのイベントハンドラ"""
         if self.is_playing:
-            pygame.mixer.music.stop()
+            if self._cancel_select():
+                # 停止中はドロップダウンで選んだ曲がそのまま次に再生する曲になる
+                self.current_index = self.pending_index
+            self._stop_output()
             self.is_playing = False
             self.is_paused = False
-            self.current_file_label.value = "<b>再生ファイル:</b> なし"
-            self.progress_bar.value = 0
+            self.last_progress = 0
+            # 表示のリセットはまとめてフロントエンドに同期
+            with self.current_file_label.hold_sync(), self.progress_bar.hold_sync():
+                self.current_file_label.value = "<b>再生ファイル:</b> なし"
+                self.progress_bar.value = 0
     
     def _on_prev(self, b):
         """前へボタンのイベントハンドラ"""
@@ -208,38 +334,150 @@ class WAVPlayer:
     def _on_volume_change(self, change):
         """音量スライダーの変更イベントハンドラ"""
         self.volume = change['new']
-        pygame.mixer.music.set_volume(self.volume)
+        if self.mixer_ready:
+            pygame.mixer.music.set_volume(self.volume)
+        if self.channel is not None:
+            self.channel.set_volume(self.volume)
     
     def _play_current(self):
         """現在選択されているファイルを再生する"""
         if 0 <= self.current_index < len(self.file_list):
             current_file = self.file_list[self.current_index]
             
-            # 通常の再生
+            # 読み込み待ちの選択があれば取り消す（これから現在の曲を読み込むため）
+            self._cancel_select()
+            
             try:
-                pygame.mixer.music.load(current_file)
-                pygame.mixer.music.play()
+                self._init_mixer()
+                self._stop_output()
+                if self._fits_in_memory(current_file):
+                    # メモリ上のSoundで再生（一度読み込んだ曲は前へ/次へでディスクを読まない）
+                    self.channel = self._get_sound(current_file).play()
+                    self.channel.set_volume(self.volume)  # Channelの音量はplay()でリセットされる
+                    self.channel.set_endevent(self.MUSIC_END)
+                else:
+                    # 大きいファイルは通常のストリーミング再生
+                    pygame.mixer.music.load(current_file)
+                    pygame.mixer.music.play()
+                self.play_start = time.monotonic()
+                self.paused_total = 0
+                self.pause_start = None
                 
-                # 再生状態とファイル名表示を更新
+                # 再生状態を更新
                 self.is_playing = True
                 self.is_paused = False
-                self.current_file = os.path.basename(current_file)
-                self.current_file_label.value = f"<b>再生ファイル:</b> {self.current_file}"
+                self.current_file = self.basenames[self.current_index]
             except Exception as e:
                 print(f"ファイルの再生中にエラーが発生しました: {e}")
                 return
             
-            # プログレスバーをリセット
-            self.progress_bar.value = 0
-            
-            # ドロップダウンメニューを同期
-            self.file_dropdown.value = self.current_index
+            # ファイル名表示・プログレスバー・ドロップダウンの更新はまとめてフロントエンドに同期
+            self.last_progress = 0
+            with self.current_file_label.hold_sync(), self.progress_bar.hold_sync(), self.file_dropdown.hold_sync():
+                self.current_file_label.value = f"<b>再生ファイル:</b> {self.current_file}"
+                self.progress_bar.value = 0
+                self.file_dropdown.value = self.current_index
+    
+    def _sound_bytes(self, seconds):
+        """ミキサーの形式に展開したときのバイト数（Soundは元のファイル形式によらずこの形式になる）"""
+        frequency, size, channels = pygame.mixer.get_init()
+        return int(seconds * frequency * channels * (abs(size) // 8))
+    
+    def _fits_in_memory(self, path):
+        """Soundとしてメモリに展開して再生する曲か"""
+        try:
+            duration = self._get_duration_ms(path)
+        except Exception:
+            # 長さが分からない曲は展開後のサイズも分からないのでストリーミング再生
+            return False
+        return 0 < self._sound_bytes(duration / 1000) <= SOUND_MAX_BYTES
+    
+    def _get_sound(self, path):
+        """ファイルのSoundを取得（最近使った曲は合計SOUND_CACHE_BYTESまでメモリに保持）"""
+        sound = self.sounds.get(path)
+        if sound is not None:
+            self.sounds.move_to_end(path)
+            return sound
+        
+        sound = pygame.mixer.Sound(path)
+        self.sounds[path] = sound
+        self.sounds_bytes += self._sound_bytes(sound.get_length())
+        while self.sounds_bytes > SOUND_CACHE_BYTES and len(self.sounds) > 1:
+            # 最も長く使っていない曲から解放
+            _, old_sound = self.sounds.popitem(last=False)
+            self.sounds_bytes -= self._sound_bytes(old_sound.get_length())
+        return sound
+    
+    def _track_ended(self):
+        """再生中の曲が最後まで再生されたか"""
+        if pygame.display.get_init() and pygame.event.get(self.MUSIC_END):
+            # SDLのイベントが使える場合は終了イベントで判定
+            # （_tickはイベントループ上＝メインスレッドで実行されるので、ここでイベントを取り出せる）
+            # event.get()は内部でpumpしてから、終了イベントだけを取り出す
+            return True
+        # displayを初期化していない環境ではイベントが送られず、他のコードがevent.get()で
+        # 終了イベントを取り出してしまうこともあるので、ミキサーの状態でも判定する
+        return not self._is_busy()
+    
+    def _is_busy(self):
+        """再生中の音声が鳴っているか"""
+        if self.channel is not None:
+            return self.channel.get_busy()
+        return pygame.mixer.music.get_busy()
+    
+    def _stop_output(self):
+        """再生中のSoundまたはmixer.musicを停止"""
+        if self.channel is not None:
+            self.channel.stop()
+            self.channel = None
+        pygame.mixer.music.stop()
+        if pygame.display.get_init():
+            # 停止でも終了イベントが送られるので、曲の終了と誤認しないよう捨てる
+            pygame.event.clear(self.MUSIC_END)
+    
+    def _init_mixer(self):
+        """ミキサーを初期化（初回のみ）"""
+        if not self.mixer_ready:
+            # バッファは1024サンプル（44.1kHzで約23ms）にして操作への反応を速くする
+            pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=1024)
+            pygame.mixer.music.set_volume(self.volume)
+            pygame.mixer.music.set_endevent(self.MUSIC_END)
+            self.mixer_ready = True
     
     def cleanup(self):
         """リソースの解放"""
+        if not self.file_list:
+            # WAVファイルがなければ監視もミキサーも開始していない
+            return
+        
+        # cleanup()はカーネルのスレッドで呼ばれるので、監視をその場で止める
+        # （止めないとミキサーの終了中に_tickが曲の終了と判断して次の曲を再生してしまう）
+        self.monitor_callback.stop()
+        self._cancel_select()
+        if self.mixer_ready:
+            self._stop_output()
+            self.sounds.clear()
+            self.sounds_bytes = 0
+            self.mixer_ready = False
+        self.is_playing = False
+        self.is_paused = False
+        
+        # 長さのキャッシュを保存
+        self._save_cache()
+        
         # pygameのリソースを解放
-        pygame.mixer.quit()
-        pygame.quit()
+        # mixer.quit()はPulseAudio環境で数秒止まることがあるため、終了を待たずに別スレッドで実行
+        quit_thread = threading.Thread(target=self._quit_pygame)
+        quit_thread.daemon = True
+        quit_thread.start()
+    
+    def _quit_pygame(self):
+        """pygameの終了処理（cleanupから別スレッドで呼ばれる）"""
+        # 初期化しているのはミキサーだけなので、ミキサーだけを終了する
+        try:
+            pygame.mixer.quit()
+        except pygame.error:
+            pass
 
 # 使用例
 player = WAVPlayer("outputs")